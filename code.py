@@ -1,9 +1,15 @@
 import streamlit as st
-import requests
-import json
 from datetime import datetime
 import random
 import os
+import hashlib
+import threading
+import time
+import tempfile
+import asyncio
+import httpx
+import orjson
+import diskcache
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -15,39 +21,141 @@ load_dotenv()
 
 # Groq API Configuration
 GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+GROQ_MODELS_URL = "https://api.groq.com/openai/v1/models"  # Metadata endpoint used for connection checks
 GROQ_MODEL = "llama-3.3-70b-versatile"  # Fast and good quality
 MAX_TOKENS = 300
 
 # Get API key from environment variable
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 
+def _groq_headers(api_key):
+    """Request headers set once on every Groq client rather than passed per call"""
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+
+# Shared HTTP/2 client so requests to Groq are multiplexed over one kept-alive connection.
+# Held by st.cache_resource because Streamlit re-executes this script on every rerun, and
+# keyed on the API key so a key rotated through secrets or env takes effect immediately.
+# Only the current key's client is kept, so rotations don't accumulate connection pools.
+@st.cache_resource(max_entries=1)
+def _get_client(api_key):
+    """Return the process-wide Groq HTTP client for an API key"""
+    return httpx.Client(
+        transport=httpx.HTTPTransport(
+            http2=True,
+            retries=2,
+            limits=httpx.Limits(max_keepalive_connections=4)
+        ),
+        timeout=30,
+        headers=_groq_headers(api_key)
+    )
+
+# Transient Groq responses (rate limits and gateway errors) that are retried with backoff
+_RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+_MAX_RETRIES = 2
+_RETRY_BACKOFF = 0.3  # seconds, doubled on each attempt
+_MAX_RETRY_DELAY = 5  # seconds
+
+def _retry_delay(response, attempt):
+    """Seconds to wait before retrying, honouring a numeric Retry-After header"""
+    try:
+        delay = float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        delay = _RETRY_BACKOFF * (2 ** attempt)
+    return min(max(delay, 0), _MAX_RETRY_DELAY)
+
+def _post_with_retries(client, content, stream=False):
+    """POST to the Groq chat endpoint, retrying transient error statuses"""
+    request = client.build_request("POST", GROQ_API_URL, content=content)
+    for attempt in range(_MAX_RETRIES + 1):
+        response = client.send(request, stream=stream)
+        if response.status_code not in _RETRY_STATUS_CODES or attempt == _MAX_RETRIES:
+            return response
+        response.close()
+        time.sleep(_retry_delay(response, attempt))
+
+async def _apost_with_retries(client, content):
+    """Async version of _post_with_retries"""
+    request = client.build_request("POST", GROQ_API_URL, content=content)
+    for attempt in range(_MAX_RETRIES + 1):
+        response = await client.send(request)
+        if response.status_code not in _RETRY_STATUS_CODES or attempt == _MAX_RETRIES:
+            return response
+        await asyncio.sleep(_retry_delay(response, attempt))
+
+class _ConnectionCheckFailed(Exception):
+    """Raised inside the cached probe so failed connection checks are not cached"""
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _probe_groq_connection(api_key):
+    """Probe Groq with an API key; only successful results are cached (for 5 minutes per key)"""
+    try:
+        response = _get_client(api_key).get(GROQ_MODELS_URL, timeout=5)
+    except httpx.TimeoutException:
+        raise _ConnectionCheckFailed("Connection timeout")
+    except httpx.ConnectError:
+        raise _ConnectionCheckFailed("Connection error")
+    except Exception as e:
+        raise _ConnectionCheckFailed(f"Error: {str(e)}")
+    
+    if response.status_code != 200:
+        raise _ConnectionCheckFailed(f"Status: {response.status_code} - {response.text[:100]}")
+    return True, "Connected"
+
 def check_groq_connection():
     """Check if Groq API is accessible"""
     if not GROQ_API_KEY:
         return False, "API key not configured. Please set GROQ_API_KEY in your environment variables."
     
     try:
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        test_payload = {
-            "model": GROQ_MODEL,
-            "messages": [{"role": "user", "content": "Hello"}],
-            "max_tokens": 5
-        }
-        response = requests.post(GROQ_API_URL, headers=headers, json=test_payload, timeout=10)
-        
-        if response.status_code == 200:
-            return True, "Connected"
-        else:
-            return False, f"Status: {response.status_code} - {response.text[:100]}"
-    except requests.exceptions.Timeout:
-        return False, "Connection timeout"
-    except requests.exceptions.ConnectionError:
-        return False, "Connection error"
-    except Exception as e:
-        return False, f"Error: {str(e)}"
+        return _probe_groq_connection(GROQ_API_KEY)
+    except _ConnectionCheckFailed as e:
+        return False, str(e)
+
+def _build_payload(prompt, system_prompt, temperature):
+    """Build the chat completion request body sent to Groq"""
+    return {
+        "model": GROQ_MODEL,
+        "messages": [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        "max_tokens": MAX_TOKENS,
+        "temperature": temperature,
+        "top_p": 0.95  # Add nucleus sampling for more variety
+    }
+
+class _GroqRequestFailed(Exception):
+    """Raised when Groq answers with an error status or an unusable response"""
+
+def _raise_for_status(response):
+    """Raise _GroqRequestFailed if Groq answered with an error status"""
+    if response.status_code != 200:
+        raise _GroqRequestFailed(f"Groq API returned status code: {response.status_code} - Response: {response.text}")
+
+def _completion_text(response):
+    """Extract the completion text from a Groq response, raising _GroqRequestFailed on error statuses"""
+    _raise_for_status(response)
+    result = orjson.loads(response.content)
+    return result.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
+
+def _groq_error_message(error):
+    """Describe an exception raised while calling Groq for display to the user"""
+    if isinstance(error, httpx.TimeoutException):
+        return "⏱️ Generation timed out"
+    if isinstance(error, httpx.ConnectError):
+        return "🔌 Cannot connect to Groq API"
+    if isinstance(error, _GroqRequestFailed):
+        return str(error)
+    return f"❌ Error generating content: {str(error)}"
 
 def generate_with_groq(prompt, system_prompt, temperature=0.9):
     """Generate text using Groq API with temperature for variation"""
@@ -56,99 +164,163 @@ def generate_with_groq(prompt, system_prompt, temperature=0.9):
         return None
     
     try:
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": GROQ_MODEL,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": system_prompt
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "max_tokens": MAX_TOKENS,
-            "temperature": temperature,
-            "top_p": 0.95  # Add nucleus sampling for more variety
-        }
+        payload = _build_payload(prompt, system_prompt, temperature)
+        response = _post_with_retries(_get_client(GROQ_API_KEY), orjson.dumps(payload))
+        return _completion_text(response)
+    except Exception as e:
+        st.error(_groq_error_message(e))
+        return None
+
+async def agenerate_with_groq(client, prompt, system_prompt, temperature=0.9):
+    """Async version of generate_with_groq; errors are raised so the caller can report them together"""
+    payload = _build_payload(prompt, system_prompt, temperature)
+    response = await _apost_with_retries(client, orjson.dumps(payload))
+    return _completion_text(response)
+
+async def _agenerate_many(requests_batch):
+    """Run (prompt, system_prompt, temperature) requests concurrently, returning text or the exception per request"""
+    # The client is scoped to the batch because asyncio.run() starts a new event loop per click
+    async with httpx.AsyncClient(
+        http2=True,
+        timeout=30,
+        limits=httpx.Limits(max_keepalive_connections=10),
+        headers=_groq_headers(GROQ_API_KEY)
+    ) as client:
+        return await asyncio.gather(*[
+            agenerate_with_groq(client, prompt, system_prompt, temperature)
+            for prompt, system_prompt, temperature in requests_batch
+        ], return_exceptions=True)
+
+def stream_with_groq(prompt, system_prompt, temperature=0.9):
+    """Stream text from Groq as it is generated, raising if the stream fails or ends before [DONE]"""
+    if not GROQ_API_KEY:
+        raise _GroqRequestFailed("❌ GROQ_API_KEY not configured")
+    
+    payload = _build_payload(prompt, system_prompt, temperature)
+    payload["stream"] = True
+    response = _post_with_retries(_get_client(GROQ_API_KEY), orjson.dumps(payload), stream=True)
+    try:
+        if response.status_code != 200:
+            response.read()
+            _raise_for_status(response)
         
-        response = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
+        # Server-sent events: each frame is "data: {json}", terminated by "data: [DONE]"
+        for line in response.iter_lines():
+            if not line.startswith("data: "):
+                continue
+            frame = line[len("data: "):]
+            if frame == "[DONE]":
+                return
+            chunk = orjson.loads(frame).get("choices", [{}])[0].get("delta", {}).get("content")
+            if chunk:
+                yield chunk
         
-        if response.status_code == 200:
-            result = response.json()
-            return result.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
-        else:
-            st.error(f"Groq API returned status code: {response.status_code}")
-            st.error(f"Response: {response.text}")
-            return None
-    except requests.exceptions.Timeout:
-        st.error("⏱️ Generation timed out")
+        raise _GroqRequestFailed("❌ Groq stream ended before the response was complete")
+    finally:
+        response.close()
+
+# Exact-match response cache limits; memory and disk entries share one expiry time
+_RESPONSE_CACHE_TTL = 86400  # seconds
+_RESPONSE_CACHE_MAX_ENTRIES = 256
+_DISK_CACHE_SIZE_LIMIT = 100 * 1024 * 1024  # bytes
+
+@st.cache_resource
+def _response_cache():
+    """Process-wide store of generated text, shared by all sessions"""
+    return {}, threading.Lock()
+
+@st.cache_resource
+def _disk_cache():
+    """Persistent store of generated text that survives app restarts, or None if it cannot be opened"""
+    try:
+        return diskcache.Cache(os.path.join(tempfile.gettempdir(), "groq_cache"), size_limit=_DISK_CACHE_SIZE_LIMIT)
+    except Exception:
         return None
-    except requests.exceptions.ConnectionError:
-        st.error("🔌 Cannot connect to Groq API")
+
+def _response_cache_key(system_prompt, prompt, temperature):
+    """Fingerprint a Groq request by model, prompts and temperature bucket"""
+    request = {"m": GROQ_MODEL, "s": system_prompt, "p": prompt, "t": temperature}
+    return hashlib.sha256(orjson.dumps(request)).hexdigest()
+
+def _get_cached_response(key):
+    """Return cached text for a request fingerprint from memory or disk, or None"""
+    cache, lock = _response_cache()
+    with lock:
+        entry = cache.get(key)
+    if entry and time.time() < entry[1]:
+        return entry[0]
+    
+    disk = _disk_cache()
+    if disk is None:
         return None
-    except Exception as e:
-        st.error(f"❌ Error generating content: {str(e)}")
+    try:
+        text, expires_at = disk.get(key, expire_time=True)
+    except Exception:
+        # Disk cache problems (read-only temp dir, locked database) are treated as a miss
         return None
+    if text is not None:
+        # Keep the disk expiry so promoting an entry does not extend its lifetime
+        _remember_response(key, text, expires_at or time.time() + _RESPONSE_CACHE_TTL)
+    return text
 
-def generate_cv_sections(data, variation_number=0):
-    """Generate CV summaries from form data with variations"""
-    
-    # Determine target market based on aspiration
-    aspiration = data.get('aspiration', '')
-    if aspiration in ["Interested in studying abroad", "Work as a freelancer"]:
-        target_market = "International"
-    else:
-        target_market = "Pakistan"
-    
-    # Create aspiration-specific guidance with variation prompts
-    aspiration_guidance = ""
-    
-    # Expanded variation styles with more diversity
-    variation_styles = [
-        "Lead with achievements and quantifiable results. Start with your strongest accomplishment.",
-        "Open with your passion and what drives you. Emphasize commitment and enthusiasm.",
-        "Begin by highlighting your unique competitive advantages and specialized skills.",
-        "Start with your adaptability and how you embrace new challenges and learning.",
-        "Open with a problem you solved or impact you created. Focus on outcomes.",
-        "Lead with your professional identity and what makes you stand out in your field.",
-        "Begin with your career goals and how your background prepares you for them.",
-        "Start by describing your professional journey and key milestones.",
-        "Open with your technical expertise and how you apply it effectively.",
-        "Lead with your collaborative strengths and team contributions."
-    ]
-    
-    # Select variation style based on variation number
-    variation_style = variation_styles[variation_number % len(variation_styles)]
-    
-    if aspiration == "Interested in studying abroad":
-        aspiration_guidance = "Emphasize academic achievements, research interests, international aspirations, adaptability, and desire for global education. Highlight qualifications that make them a strong candidate for international universities."
-    elif aspiration == "Want to serve Family Business":
-        aspiration_guidance = "Focus on family business values, loyalty, entrepreneurial mindset, relevant skills for business growth, and commitment to continuing family legacy. Show blend of tradition and innovation."
-    elif aspiration == "New Start-up (Business)":
-        aspiration_guidance = "Highlight entrepreneurial spirit, innovation, problem-solving skills, leadership qualities, risk-taking abilities, and vision for creating new ventures. Show passion for building something new."
-    elif aspiration == "Work as a freelancer":
-        aspiration_guidance = "Emphasize self-motivation, diverse skill set, flexibility, client management abilities, independent work style, and track record of delivering projects. Show versatility and reliability."
-    elif aspiration == "Interested in Job":
-        aspiration_guidance = "Focus on professional qualifications, team collaboration, career growth mindset, organizational skills, and readiness to contribute to company success. Show you're a valuable employee."
-    elif aspiration == "Want to continue studies in Pakistan":
-        aspiration_guidance = "Highlight academic dedication, research interests, commitment to local education system, desire for advanced knowledge, and contributions to Pakistan's academic community."
-    
-    # Add variation instruction to aspiration guidance
-    aspiration_guidance += f" {variation_style}"
-    
-    system_prompt = f"""You are an expert CV writer for {target_market} job markets. 
+def _remember_response(key, text, expires_at):
+    """Keep generated text in memory, evicting the oldest entries past the size limit"""
+    cache, lock = _response_cache()
+    with lock:
+        cache.pop(key, None)
+        cache[key] = (text, expires_at)
+        while len(cache) > _RESPONSE_CACHE_MAX_ENTRIES:
+            cache.pop(next(iter(cache)))
+
+def _store_cached_response(key, text):
+    """Store generated text in memory and, when available, on disk"""
+    _remember_response(key, text, time.time() + _RESPONSE_CACHE_TTL)
+    disk = _disk_cache()
+    if disk is None:
+        return
+    try:
+        disk.set(key, text, expire=_RESPONSE_CACHE_TTL)
+    except Exception:
+        # A failed write only loses persistence; the in-memory entry still serves this process
+        pass
+
+# Expanded variation styles with more diversity
+_VARIATION_STYLES = (
+    "Lead with achievements and quantifiable results. Start with your strongest accomplishment.",
+    "Open with your passion and what drives you. Emphasize commitment and enthusiasm.",
+    "Begin by highlighting your unique competitive advantages and specialized skills.",
+    "Start with your adaptability and how you embrace new challenges and learning.",
+    "Open with a problem you solved or impact you created. Focus on outcomes.",
+    "Lead with your professional identity and what makes you stand out in your field.",
+    "Begin with your career goals and how your background prepares you for them.",
+    "Start by describing your professional journey and key milestones.",
+    "Open with your technical expertise and how you apply it effectively.",
+    "Lead with your collaborative strengths and team contributions."
+)
+
+# Sampling temperatures cycled through by variation number
+_TEMP_BUCKETS = (0.85, 0.9, 0.95, 1.0)
+
+# Aspirations that target the international market rather than Pakistan
+_INTL_ASPIRATIONS = frozenset({"Interested in studying abroad", "Work as a freelancer"})
+
+# Aspiration-specific guidance for the prompt
+_ASPIRATION_GUIDANCE = {
+    "Interested in studying abroad": "Emphasize academic achievements, research interests, international aspirations, adaptability, and desire for global education. Highlight qualifications that make them a strong candidate for international universities.",
+    "Want to serve Family Business": "Focus on family business values, loyalty, entrepreneurial mindset, relevant skills for business growth, and commitment to continuing family legacy. Show blend of tradition and innovation.",
+    "New Start-up (Business)": "Highlight entrepreneurial spirit, innovation, problem-solving skills, leadership qualities, risk-taking abilities, and vision for creating new ventures. Show passion for building something new.",
+    "Work as a freelancer": "Emphasize self-motivation, diverse skill set, flexibility, client management abilities, independent work style, and track record of delivering projects. Show versatility and reliability.",
+    "Interested in Job": "Focus on professional qualifications, team collaboration, career growth mindset, organizational skills, and readiness to contribute to company success. Show you're a valuable employee.",
+    "Want to continue studies in Pakistan": "Highlight academic dedication, research interests, commitment to local education system, desire for advanced knowledge, and contributions to Pakistan's academic community."
+}
+
+# Prompt templates, filled in with str.format by generate_cv_sections
+_SYSTEM_PROMPT_TEMPLATE = """You are an expert CV writer for {target_market} job markets. 
 Always write exactly 70 words. Write in first person perspective.
 Create a unique and compelling narrative each time, varying sentence structure and emphasis.
-Variation #{variation_number + 1} - Make this version distinctly different from previous versions."""
+Variation #{variation_number} - Make this version distinctly different from previous versions."""
 
-    prompt = f"""
+_PROMPT_TEMPLATE = """
 Generate a professional CV "About Me" section for someone with the following profile:
 
 TARGET MARKET: {target_market}
@@ -156,37 +328,37 @@ CAREER ASPIRATION: {aspiration}
 {aspiration_guidance}
 
 EDUCATION:
-University: {data.get('university', 'N/A')}
-Major Subject: {data.get('major_subject', 'N/A')}
-Status: {data.get('degree_status', '')}
-Pass out: {data.get('passout_session', 'N/A')}
-Final Year Project: {data.get('final_year_project', 'N/A')}
+University: {university}
+Major Subject: {major_subject}
+Status: {degree_status}
+Pass out: {passout_session}
+Final Year Project: {final_year_project}
 
 EXPERIENCE:
-Organization: {data.get('organization', 'N/A')}
-Designation: {data.get('designation', '')}
-Years: {data.get('experience_years', '')}
-Status: {data.get('experience_status', '')}
-Industry: {data.get('industry', '')}
-Work Detail: {data.get('work_detail', 'N/A')}
+Organization: {organization}
+Designation: {designation}
+Years: {experience_years}
+Status: {experience_status}
+Industry: {industry}
+Work Detail: {work_detail}
 
 SKILLS & INTERESTS:
-Technical Skills: {data.get('technical_skills', '')}
-IT Skills: {data.get('it_skills', 'N/A')}
-Interests: {data.get('interests', 'N/A')}
-Certifications: {data.get('certifications', 'N/A')}
-Awards: {data.get('medal_holder', 'N/A')}
+Technical Skills: {technical_skills}
+IT Skills: {it_skills}
+Interests: {interests}
+Certifications: {certifications}
+Awards: {medal_holder}
 
 ACHIEVEMENTS:
-{data.get('achievements', '')}
+{achievements}
 
 HONOURS:
-{data.get('honours', 'N/A')}
+{honours}
 
 REFERENCES:
-Name: {data.get('ref_name', 'N/A')}
-Designation: {data.get('ref_designation', 'N/A')}
-Organization: {data.get('ref_organization', 'N/A')}
+Name: {ref_name}
+Designation: {ref_designation}
+Organization: {ref_organization}
 
 CRITICAL REQUIREMENTS:
 1. Write exactly 70 words
@@ -196,66 +368,211 @@ CRITICAL REQUIREMENTS:
 5. Use appropriate tone for {target_market} market (Pakistan: formal and respectful, International: direct and results-focused)
 6. Create a UNIQUE version - vary the opening, structure, and emphasis from typical CV summaries
 
-VARIATION INSTRUCTION: This is variation #{variation_number + 1}. Make it distinctly different by using alternative phrasing and different angle of emphasis.
+VARIATION INSTRUCTION: This is variation #{variation_number}. Make it distinctly different by using alternative phrasing and different angle of emphasis.
 """
+
+# Form fields backed by selectboxes, and the minimum number of other fields to fill before generating
+_SELECT_FIELDS = frozenset({'degree_status', 'experience_status', 'aspiration'})
+_MIN_FILLED_FIELDS = 5
+
+# Profile fields interpolated into _PROMPT_TEMPLATE
+_PROMPT_FIELDS = frozenset({
+    'university',
+    'major_subject',
+    'degree_status',
+    'passout_session',
+    'final_year_project',
+    'organization',
+    'designation',
+    'experience_years',
+    'experience_status',
+    'industry',
+    'work_detail',
+    'technical_skills',
+    'it_skills',
+    'interests',
+    'certifications',
+    'medal_holder',
+    'achievements',
+    'honours',
+    'ref_name',
+    'ref_designation',
+    'ref_organization'
+})
+
+def _build_cv_request(data, variation_number):
+    """Build the prompts, temperature and target market for one CV variation"""
     
-    # Use higher temperature for more variation
-    temperature = 0.85 + (random.random() * 0.15)  # Random between 0.85 and 1.0
-    text = generate_with_groq(prompt, system_prompt, temperature)
+    # Determine target market based on aspiration
+    aspiration = data.get('aspiration', '')
+    target_market = "International" if aspiration in _INTL_ASPIRATIONS else "Pakistan"
+    
+    # Create aspiration-specific guidance with variation prompts
+    aspiration_guidance = _ASPIRATION_GUIDANCE.get(aspiration, "")
+    
+    # Select variation style based on variation number
+    variation_style = _VARIATION_STYLES[variation_number % len(_VARIATION_STYLES)]
+    
+    # Add variation instruction to aspiration guidance
+    aspiration_guidance += f" {variation_style}"
+    
+    # Missing or blank profile fields are shown to the model as "N/A"
+    safe = {key: data.get(key) or 'N/A' for key in _PROMPT_FIELDS}
+    system_prompt = _SYSTEM_PROMPT_TEMPLATE.format(
+        target_market=target_market,
+        variation_number=variation_number + 1
+    )
+    prompt = _PROMPT_TEMPLATE.format(
+        **safe,
+        target_market=target_market,
+        aspiration=aspiration,
+        aspiration_guidance=aspiration_guidance,
+        variation_number=variation_number + 1
+    )
+    
+    # Use higher temperature for more variation, fixed per variation so requests stay cacheable
+    temperature = _TEMP_BUCKETS[variation_number % len(_TEMP_BUCKETS)]
+    
+    return system_prompt, prompt, temperature, target_market
+
+def _build_section(text, data, target_market, variation_number):
+    """Package generated text with the metadata shown next to it"""
+    return {
+        "text": text,
+        "timestamp": f"{datetime.now():%Y-%m-%d %H:%M:%S}",
+        "designation": data.get('designation', ''),
+        "market": target_market,
+        "aspiration": data.get('aspiration', ''),
+        "university": data.get('university', ''),
+        "variation": variation_number + 1
+    }
+
+def generate_cv_sections(data, variation_number=0, stream_to=None, use_cache=True):
+    """Generate CV summaries from form data with variations, streaming into the stream_to placeholder if given"""
+    system_prompt, prompt, temperature, target_market = _build_cv_request(data, variation_number)
+    
+    # Identical prompts in the same temperature bucket are served from cache,
+    # unless the caller explicitly wants a fresh generation
+    prompt_hash = _response_cache_key(system_prompt, prompt, temperature)
+    text = _get_cached_response(prompt_hash) if use_cache else None
+    if text is None:
+        if stream_to is not None:
+            try:
+                text = (stream_to.write_stream(stream_with_groq(prompt, system_prompt, temperature)) or "").strip()
+            except Exception as e:
+                # Drop the partial output so a failed or truncated stream is never shown or cached
+                stream_to.empty()
+                st.error(_groq_error_message(e))
+                text = None
+        else:
+            text = generate_with_groq(prompt, system_prompt, temperature)
+        if text:
+            _store_cached_response(prompt_hash, text)
     
     if text:
-        return {
-            "text": text,
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "designation": data.get('designation', ''),
-            "market": target_market,
-            "aspiration": aspiration,
-            "university": data.get('university', ''),
-            "variation": variation_number + 1
-        }
+        return _build_section(text, data, target_market, variation_number)
     
     return None
 
+def generate_cv_variations(data, start_variation=0, count=5):
+    """Generate several CV summary variations concurrently, skipping any that fail"""
+    built = [_build_cv_request(data, start_variation + i) for i in range(count)]
+    keys = [_response_cache_key(system_prompt, prompt, temperature) for system_prompt, prompt, temperature, _ in built]
+    texts = [_get_cached_response(key) for key in keys]
+    
+    # Only variations missing from the cache go to Groq
+    pending = [offset for offset, text in enumerate(texts) if text is None]
+    if pending:
+        results = asyncio.run(_agenerate_many([
+            (built[offset][1], built[offset][0], built[offset][2])
+            for offset in pending
+        ]))
+        errors = []
+        for offset, result in zip(pending, results):
+            if isinstance(result, BaseException):
+                errors.append(_groq_error_message(result))
+            elif result:
+                texts[offset] = result
+                _store_cached_response(keys[offset], result)
+        
+        # Report failures once for the whole batch instead of once per request
+        if errors:
+            st.error(f"{len(errors)} of {count} variations failed: " + "; ".join(dict.fromkeys(errors)))
+    
+    sections = []
+    for offset, text in enumerate(texts):
+        if text:
+            target_market = built[offset][3]
+            sections.append(_build_section(text, data, target_market, start_variation + offset))
+    return sections
+
+# Sample data pools for the autofill button
+_SAMPLE_UNIVERSITIES = ("LUMS", "NUST", "FAST", "UET", "COMSATS")
+_SAMPLE_MAJORS = ("Computer Science", "Software Engineering", "Data Analytics", "Marketing", "Finance")
+_SAMPLE_ORGS = ("TechSol", "DataCorp", "InnovateTech", "SoftSolutions", "Digital Dynamics")
+_SAMPLE_DESIGNATIONS = ("Software Engineer", "Data Analyst", "Product Manager", "Web Developer", "Business Analyst")
+_SAMPLE_INDUSTRIES = ("Information Technology", "Software Development", "E-commerce", "Banking", "Telecommunications")
+_SAMPLE_SKILLS = ("Python, JavaScript, SQL", "Java, C++, React", "Data Analysis, Machine Learning", "Marketing, SEO, Content", "Finance, Excel, PowerBI")
+_SAMPLE_ACHIEVEMENTS = (
+    "Developed a full-stack web application with 1000+ active users",
+    "Led a team of 5 developers to deliver project 2 weeks ahead of schedule",
+    "Increased company revenue by 15% through data-driven marketing strategies",
+    "Published research paper on AI applications in healthcare",
+    "Won best performer award for 3 consecutive quarters"
+)
+_SAMPLE_REF_ORGANIZATIONS = _SAMPLE_UNIVERSITIES + _SAMPLE_ORGS
+
 def get_random_sample_data():
     """Return random sample data for testing"""
-    sample_universities = ["LUMS", "NUST", "FAST", "UET", "COMSATS"]
-    sample_majors = ["Computer Science", "Software Engineering", "Data Analytics", "Marketing", "Finance"]
-    sample_orgs = ["TechSol", "DataCorp", "InnovateTech", "SoftSolutions", "Digital Dynamics"]
-    sample_designations = ["Software Engineer", "Data Analyst", "Product Manager", "Web Developer", "Business Analyst"]
-    sample_industries = ["Information Technology", "Software Development", "E-commerce", "Banking", "Telecommunications"]
-    sample_skills = ["Python, JavaScript, SQL", "Java, C++, React", "Data Analysis, Machine Learning", "Marketing, SEO, Content", "Finance, Excel, PowerBI"]
-    sample_achievements = [
-        "Developed a full-stack web application with 1000+ active users",
-        "Led a team of 5 developers to deliver project 2 weeks ahead of schedule",
-        "Increased company revenue by 15% through data-driven marketing strategies",
-        "Published research paper on AI applications in healthcare",
-        "Won best performer award for 3 consecutive quarters"
-    ]
-    
+    # Inline pools are tuple literals so Python stores them as constants instead of building lists per call
     return {
-        'university': random.choice(sample_universities),
-        'major_subject': random.choice(sample_majors),
-        'degree_status': random.choice(["Completed", "In Progress"]),
+        'university': random.choice(_SAMPLE_UNIVERSITIES),
+        'major_subject': random.choice(_SAMPLE_MAJORS),
+        'degree_status': random.choice(("Completed", "In Progress")),
         'passout_session': str(random.randint(2020, 2024)),
-        'final_year_project': f"Smart {random.choice(['Attendance', 'Inventory', 'Learning', 'Health'])} System using AI",
-        'organization': random.choice(sample_orgs),
-        'designation': random.choice(sample_designations),
+        'final_year_project': f"Smart {random.choice(('Attendance', 'Inventory', 'Learning', 'Health'))} System using AI",
+        'organization': random.choice(_SAMPLE_ORGS),
+        'designation': random.choice(_SAMPLE_DESIGNATIONS),
         'experience_years': f"{random.randint(1, 5)} years",
-        'experience_status': random.choice(["Current", "Previous"]),
-        'industry': random.choice(sample_industries),
-        'work_detail': f"Responsible for {random.choice(['developing', 'managing', 'analyzing', 'designing'])} {random.choice(['web applications', 'data pipelines', 'business processes', 'user interfaces'])}",
-        'technical_skills': random.choice(sample_skills),
-        'it_skills': f"Microsoft Office, {random.choice(['Photoshop', 'Figma', 'Tableau', 'PowerBI'])}",
-        'interests': f"{random.choice(['Reading', 'Sports', 'Music', 'Traveling', 'Photography'])}, {random.choice(['Technology', 'Business', 'Innovation', 'Research'])}",
-        'certifications': f"{random.choice(['AWS Certified', 'Google Certified', 'Microsoft Certified', 'PMP'])} - {random.choice(['Cloud Practitioner', 'Data Analyst', 'Azure Fundamentals', 'Project Management'])}",
-        'medal_holder': random.choice(["Dean's List", "Gold Medalist", "Merit Scholarship", "Best Graduate Award"]),
-        'achievements': random.choice(sample_achievements),
-        'honours': f"Graduated with {random.choice(['Distinction', 'Honors', 'High GPA'])}",
-        'ref_name': "Dr. " + random.choice(["Sarah", "John", "Michael", "Emma", "David"]) + " " + random.choice(["Khan", "Ahmad", "Hassan", "Sheikh"]),
-        'ref_designation': random.choice(["Professor", "Senior Manager", "Director", "Team Lead"]),
-        'ref_organization': random.choice(sample_universities + sample_orgs)
+        'experience_status': random.choice(("Current", "Previous")),
+        'industry': random.choice(_SAMPLE_INDUSTRIES),
+        'work_detail': f"Responsible for {random.choice(('developing', 'managing', 'analyzing', 'designing'))} {random.choice(('web applications', 'data pipelines', 'business processes', 'user interfaces'))}",
+        'technical_skills': random.choice(_SAMPLE_SKILLS),
+        'it_skills': f"Microsoft Office, {random.choice(('Photoshop', 'Figma', 'Tableau', 'PowerBI'))}",
+        'interests': f"{random.choice(('Reading', 'Sports', 'Music', 'Traveling', 'Photography'))}, {random.choice(('Technology', 'Business', 'Innovation', 'Research'))}",
+        'certifications': f"{random.choice(('AWS Certified', 'Google Certified', 'Microsoft Certified', 'PMP'))} - {random.choice(('Cloud Practitioner', 'Data Analyst', 'Azure Fundamentals', 'Project Management'))}",
+        'medal_holder': random.choice(("Dean's List", "Gold Medalist", "Merit Scholarship", "Best Graduate Award")),
+        'achievements': random.choice(_SAMPLE_ACHIEVEMENTS),
+        'honours': f"Graduated with {random.choice(('Distinction', 'Honors', 'High GPA'))}",
+        'ref_name': "Dr. " + random.choice(("Sarah", "John", "Michael", "Emma", "David")) + " " + random.choice(("Khan", "Ahmad", "Hassan", "Sheikh")),
+        'ref_designation': random.choice(("Professor", "Senior Manager", "Director", "Team Lead")),
+        'ref_organization': random.choice(_SAMPLE_REF_ORGANIZATIONS)
     }
 
+def render_generated_section(placeholder, section):
+    """Render a generated section and its metadata into a placeholder, replacing its contents"""
+    with placeholder.container():
+        st.success("✅ About Me section generated successfully!")
+        
+        st.header("📝 Generated About Me Section")
+        
+        # Create columns for better layout
+        col1, col2 = st.columns([3, 1])
+        
+        with col1:
+            st.text_area(
+                "Your Professional About Me",
+                value=section['text'],
+                height=200,
+                key=f"generated_section_v{section['variation']}"
+            )
+        
+        with col2:
+            st.info("**Target Market:** " + section['market'])
+            st.info("**Aspiration:** " + section['aspiration'])
+            st.info(f"**Version:** {section['variation']}")
+            st.caption(f"Generated: {section['timestamp']}")
+
 # Streamlit UI
 st.set_page_config(
     page_title="About Me Generator",
@@ -293,6 +610,8 @@ if 'form_data' not in st.session_state:
     st.session_state.form_data = {}
 if 'variation_count' not in st.session_state:
     st.session_state.variation_count = 0
+if 'variations' not in st.session_state:
+    st.session_state.variations = []
 
 # Autofill button
 col1, col2 = st.columns([1, 3])
@@ -370,35 +689,41 @@ with st.form("cv_form"):
     submitted = st.form_submit_button("🚀 Generate About Me Section", type="primary")
     
     if submitted:
+        # Prepare data
+        form_data = {
+            'university': university,
+            'major_subject': major_subject,
+            'degree_status': degree_status,
+            'passout_session': passout_session,
+            'final_year_project': final_year_project,
+            'organization': organization,
+            'designation': designation,
+            'experience_years': experience_years,
+            'experience_status': experience_status,
+            'industry': industry,
+            'work_detail': work_detail,
+            'technical_skills': technical_skills,
+            'it_skills': it_skills,
+            'interests': interests,
+            'certifications': certifications,
+            'medal_holder': medal_holder,
+            'achievements': achievements,
+            'honours': honours,
+            'ref_name': ref_name,
+            'ref_designation': ref_designation,
+            'ref_organization': ref_organization,
+            'aspiration': aspiration
+        }
+        
+        # Free-text fields with content; selectboxes always have a value so they don't count
+        filled_fields = sum(1 for key, value in form_data.items() if key not in _SELECT_FIELDS and value.strip())
+        
         if not achievements:
             st.error("Please fill in all required fields (marked with *)")
+        elif filled_fields < _MIN_FILLED_FIELDS:
+            # Skip the API call; a mostly "N/A" prompt produces a weak result
+            st.warning(f"Please fill at least {_MIN_FILLED_FIELDS} fields for a better About Me section")
         else:
-            # Prepare data
-            form_data = {
-                'university': university,
-                'major_subject': major_subject,
-                'degree_status': degree_status,
-                'passout_session': passout_session,
-                'final_year_project': final_year_project,
-                'organization': organization,
-                'designation': designation,
-                'experience_years': experience_years,
-                'experience_status': experience_status,
-                'industry': industry,
-                'work_detail': work_detail,
-                'technical_skills': technical_skills,
-                'it_skills': it_skills,
-                'interests': interests,
-                'certifications': certifications,
-                'medal_holder': medal_holder,
-                'achievements': achievements,
-                'honours': honours,
-                'ref_name': ref_name,
-                'ref_designation': ref_designation,
-                'ref_organization': ref_organization,
-                'aspiration': aspiration
-            }
-            
             # Check if form data changed (especially aspiration)
             form_changed = st.session_state.form_data.get('aspiration') != aspiration or st.session_state.form_data != form_data
             
@@ -408,40 +733,24 @@ with st.form("cv_form"):
             # Reset variation count if form changed
             if form_changed:
                 st.session_state.variation_count = 0
+                st.session_state.variations = []
             
-            # Generate section
+            # Generate section; the streamed preview is cleared once the result below takes over
             with st.spinner("Generating your About Me section..."):
-                generated_section = generate_cv_sections(form_data, st.session_state.variation_count)
+                stream_placeholder = st.empty()
+                generated_section = generate_cv_sections(form_data, st.session_state.variation_count, stream_to=stream_placeholder)
+                stream_placeholder.empty()
                 
                 if generated_section:
                     st.session_state.generated_section = generated_section
                     st.session_state.variation_count += 1
-                    st.rerun()
 
 # Display generated section
 if st.session_state.generated_section:
-    st.success("✅ About Me section generated successfully!")
-    
-    section = st.session_state.generated_section
-    
-    st.header("📝 Generated About Me Section")
-    
-    # Create columns for better layout
-    col1, col2 = st.columns([3, 1])
-    
-    with col1:
-        st.text_area(
-            "Your Professional About Me",
-            value=section['text'],
-            height=200,
-            key=f"generated_section_v{section['variation']}"
-        )
-    
-    with col2:
-        st.info("**Target Market:** " + section['market'])
-        st.info("**Aspiration:** " + section['aspiration'])
-        st.info(f"**Version:** {section['variation']}")
-        st.caption(f"Generated: {section['timestamp']}")
+    # Placeholders let Regenerate stream its preview and redraw the section in place instead of rerunning the script
+    result_placeholder = st.empty()
+    render_generated_section(result_placeholder, st.session_state.generated_section)
+    regenerate_stream_placeholder = st.empty()
     
     # Action buttons
     col_btn1, col_btn2, col_btn3 = st.columns([1, 1, 2])
@@ -455,13 +764,41 @@ if st.session_state.generated_section:
             if st.session_state.form_data:
                 with st.spinner("Regenerating with new variation..."):
                     # Generate with incremented variation number
-                    new_section = generate_cv_sections(st.session_state.form_data, st.session_state.variation_count)
+                    new_section = generate_cv_sections(st.session_state.form_data, st.session_state.variation_count, stream_to=regenerate_stream_placeholder, use_cache=False)
+                    regenerate_stream_placeholder.empty()
+                    
+                    # On failure the current section stays as rendered; redrawing it would re-register its widget key
                     if new_section:
                         st.session_state.generated_section = new_section
                         st.session_state.variation_count += 1
-                        st.rerun()
+                        render_generated_section(result_placeholder, new_section)
             else:
                 st.warning("Please fill and submit the form first")
+    
+    with col_btn3:
+        if st.button("✨ Generate 5 Variations", use_container_width=True):
+            if st.session_state.form_data:
+                with st.spinner("Generating 5 variations in parallel..."):
+                    variations = generate_cv_variations(st.session_state.form_data, st.session_state.variation_count, 5)
+                    if variations:
+                        st.session_state.variations = variations
+                        st.session_state.variation_count += 5
+            else:
+                st.warning("Please fill and submit the form first")
+    
+    # Display batch-generated variations
+    if st.session_state.variations:
+        st.header("🧩 More Variations")
+        tabs = st.tabs([f"Version {variation['variation']}" for variation in st.session_state.variations])
+        for tab, variation in zip(tabs, st.session_state.variations):
+            with tab:
+                st.text_area(
+                    "Alternative About Me",
+                    value=variation['text'],
+                    height=200,
+                    key=f"variation_section_v{variation['variation']}"
+                )
+                st.caption(f"Generated: {variation['timestamp']}")
 
 # Footer
 st.markdown("---")